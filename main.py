@@ -2,27 +2,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import time
 import random
-from PIL import Image
-import io
-import base64
-import pandas as pd
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier
 import pickle
 
-# Cargar dataset simulado
-df = pd.read_excel("customer_records.xlsx")
-scaler = StandardScaler()
-df_filtrado = df[["Edad","Antigüedad","Balance","ProductosContratados","BalancePromedio","CreditoOtorgado"]]
-X = df_filtrado[["Edad","Antigüedad","Balance","ProductosContratados","BalancePromedio"]]
-scaler.fit(X)
-
-random_forest = pickle.load(open("random_forest_model_mini.pkl", 'rb'))
 # Configuración de la página
 st.set_page_config(
     page_title="Zenda PoC - Sistema de Scoring Crediticio Alternativo",
@@ -32,7 +16,7 @@ st.set_page_config(
 )
 
 # CSS personalizado
-st.markdown("""
+_STATIC_CSS = """
 <style>
     .main-header {
         background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
@@ -75,89 +59,139 @@ st.markdown("""
         margin: 10px 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_STATIC_CSS, unsafe_allow_html=True)
 
-# Datos simulados
+# Datos simulados (columnas como arrays NumPy, una fila por país)
 @st.cache_data
 def get_sample_data():
-    return [
-        {
-            "country": "Cualquiera", 
-            "currency": "EUR",
-            "bank_name": "BBVA",
-            "balance": 38000,
-            "balance_promedio": 28000,
-            "anomalous_transactions": 0,
-            "risk_country": False,
-            "income_stability": 0.92,
-            "account_age_months": 18
-        }
-    ]
-
-def calculate_credit_score(data):
-    # "Edad","Antigüedad","Balance","ProductosContratados","BalancePromedio"
-    y_pred = random_forest.predict(
-        scaler.transform([[
-            data["edad"],
-            data["antiguedad"],
-            data["balance"],
-            data["productos"],
-            data["balance_promedio"]
-        ]])
-    )
-    
-    approved = y_pred[0]
+    return {
+        "country": np.array(["Cualquiera"], dtype=object),
+        "currency": np.array(["EUR"], dtype=object),
+        "bank_name": np.array(["BBVA"], dtype=object),
+        "balance": np.array([38000], dtype=np.int64),
+        "balance_promedio": np.array([28000], dtype=np.int64),
+        "anomalous_transactions": np.array([0], dtype=np.int64),
+        "risk_country": np.array([False]),
+        "income_stability": np.array([0.92]),
+        "account_age_months": np.array([18], dtype=np.int64)
+    }
+
+@st.cache_data
+def get_country_index():
+    """Índice país -> fila en los arrays de get_sample_data"""
+    return {country: idx for idx, country in enumerate(get_sample_data()["country"])}
+
+@st.cache_data
+def get_country_labels():
+    """Etiquetas "País (Moneda)" para el selector del sidebar"""
+    sample_data = get_sample_data()
+    return [f"{country} ({currency})" for country, currency in zip(sample_data["country"], sample_data["currency"])]
+
+# Modelo de scoring: se entrena el escalado y se carga el modelo una sola vez
+FEATURES = ["Edad","Antigüedad","Balance","ProductosContratados","BalancePromedio"]
+
+@st.cache_resource
+def load_scoring_model():
+    df = pd.read_excel("customer_records.xlsx", usecols=FEATURES)
+    scaler = StandardScaler()
+    scaler.fit(df[FEATURES])
+    with open("random_forest_model_mini.pkl", "rb") as f:
+        random_forest = pickle.load(f)
+    return scaler, random_forest
+
+def predict_approvals(features):
+    """Evalúa una matriz N x 5 de clientes en una sola llamada al modelo"""
+    scaler, random_forest = load_scoring_model()
+    features = pd.DataFrame(np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURES)), columns=FEATURES)
+    return random_forest.predict(scaler.transform(features))
+
+@st.cache_data(max_entries=1000)
+def predict_approval(features):
+    """Decisión del modelo para una fila; cacheada por valores de entrada"""
+    return predict_approvals(features)[0]
+
+def calculate_credit_score(features, confidence_seed):
+    """features: fila con los valores de FEATURES en el mismo orden"""
+    approved = predict_approval(features)
     return {
         "approved": approved,
         "factors": "",
         "recommendation": "APROBADO ✅" if approved else "RECHAZADO ❌",
-        "confidence": round(85 + random.random() * 10, 1),
+        "confidence": round(confidence_seed, 1),
         "credit_limit": 2000
     }
 
+# Símbolos de moneda indexados por código entero (monedas desconocidas -> "$")
+_CCY_IDX = {"COP": 0, "MXN": 1, "ARS": 2, "BRL": 3, "PEN": 4, "EUR": 5}
+_CCY_SYM = np.array(["$", "$", "$", "R$", "S/", "€"], dtype=object)
+
 def format_currency(amount, currency):
     """Formatea moneda según el país"""
-    symbols = {
-        "EUR": "€"
-    }
-    symbol = symbols.get(currency, "$")
-    return f"{symbol} {amount:,.0f}"
+    return f"{_CCY_SYM[_CCY_IDX.get(currency, 0)]} {amount:,.0f}"
+
+def format_currency_vec(amounts, ccy_idx):
+    """Formatea un lote de importes; ccy_idx son códigos de _CCY_IDX"""
+    symbols = _CCY_SYM[np.asarray(ccy_idx)]
+    return [f"{symbol} {amount:,.0f}" for symbol, amount in zip(symbols, amounts)]
+
+def demo_delay(label, seconds):
+    """Pausa artificial con indicador de progreso; solo si DEMO_MODE está activo en secrets"""
+    try:
+        demo_mode = st.secrets.get("DEMO_MODE", False)
+    except FileNotFoundError:
+        demo_mode = False
+    if demo_mode:
+        with st.status(label, expanded=False):
+            time.sleep(seconds)
 
 
 
 # Header principal
-st.markdown("""
+_HEADER_HTML = """
 <div class="main-header">
     <h1>🏦 Zenda PoC</h1>
     <h3>Sistema de Scoring Crediticio Alternativo para Extranjeros</h3>
     <p>Neobanco digital para expatriados, estudiantes internacionales y extranjeros en España</p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_HEADER_HTML, unsafe_allow_html=True)
 
 st.sidebar.markdown("## ⚙️ Solicitar Crédito")
 
-# Selector de país para simular
-selected_country = st.sidebar.selectbox(
-    "Pais: ",
-    [f"{data['country']} ({data['currency']})" for data in get_sample_data()]
-)
-edad = st.sidebar.text_input(
-    "Edad:"
-)
-antiguedad = st.sidebar.text_input(
-    "Antigüedad bancaria en años:"
-)
-balance = st.sidebar.text_input(
-    "Balance:"
-)
-promedio = st.sidebar.text_input(
-    "Balance promedio:"
-)
+# Rangos admitidos en el formulario: edad, antigüedad, balance, balance promedio
+_INPUT_MIN = np.array([18, 0, 0, 0])
+_INPUT_MAX = np.array([120, 100, 1e9, 1e9])
+
+# Formulario del sidebar: los campos solo provocan un rerun al enviarlo
+with st.sidebar.form("credit_form"):
+    # Selector de país para simular
+    selected_country = st.selectbox(
+        "Pais: ",
+        get_country_labels()
+    )
+    edad = st.text_input(
+        "Edad:"
+    )
+    antiguedad = st.text_input(
+        "Antigüedad bancaria en años:"
+    )
+    balance = st.text_input(
+        "Balance:"
+    )
+    promedio = st.text_input(
+        "Balance promedio:"
+    )
 
+    # Botón principal para iniciar simulación
+    submitted = st.form_submit_button("🚀 Iniciar Simulación", type="primary", use_container_width=True)
 
-# Botón principal para iniciar simulación
-if st.sidebar.button("🚀 Iniciar Simulación", type="primary", use_container_width=True):
+if submitted:
     st.session_state.start_simulation = True
+    # Confianza nueva en cada simulación, estable entre reruns sin envío
+    st.session_state.confidence = 85 + random.random() * 10
 
 # Layout principal
 col1, col2 = st.columns([1, 1])
@@ -190,46 +224,61 @@ if hasattr(st.session_state, 'start_simulation') and st.session_state.start_simu
         # Paso 1: Selección/generación de datos
         st.markdown("### 📋 Paso 1: Procesamiento de Documentos")
         
-        with st.spinner("🔍 Analizando documentos con Document AI..."):
-            time.sleep(2)
+        demo_delay("🔍 Analizando documentos con Document AI...", 2)
         
         # Seleccionar datos según la opción del usuario
         sample_data = get_sample_data()
         country_name = selected_country.split(" (")[0]
-        user_data = next(data for data in sample_data if data["country"] == country_name)
-        user_data["edad"] = edad
-        user_data["antiguedad"] = antiguedad
-        user_data["balance"] = float(balance)
-        user_data["productos"] = 1
-        user_data["balance_promedio"] = float(promedio)
+        idx = get_country_index()[country_name]
+        user_data = {column: values[idx] for column, values in sample_data.items()}
+        try:
+            if not all(value.strip() for value in (edad, antiguedad, balance, promedio)):
+                raise ValueError("campos vacíos")
+            vals = np.fromiter(
+                (edad, antiguedad, balance, promedio),
+                dtype=np.float64,
+                count=4
+            )
+            if not np.isfinite(vals).all() or (vals < _INPUT_MIN).any() or (vals > _INPUT_MAX).any():
+                raise ValueError("valores fuera de rango")
+        except ValueError:
+            vals = None
+            st.error("Valores inválidos: completa todos los campos con números (edad 18–120, antigüedad 0–100, balances 0–1.000.000.000)")
+            # No mostrar en col2 el resultado de una simulación anterior
+            st.session_state.pop("scoring_result", None)
+
+        if vals is not None:
+            user_data["edad"], user_data["antiguedad"], user_data["balance"], user_data["balance_promedio"] = vals
+            user_data["productos"] = 1
+            # Mismo orden que FEATURES: Edad, Antigüedad, Balance, ProductosContratados, BalancePromedio
+            features = np.insert(vals, 3, user_data["productos"])
         
-        st.success("✅ ¡Documentos procesados exitosamente!")
+            st.success("✅ ¡Documentos procesados exitosamente!")
         
-        # Mostrar datos extraídos
-        st.markdown("#### 📊 Información Extraída:")
+            # Mostrar datos extraídos
+            st.markdown("#### 📊 Información Extraída:")
         
-        info_col1, info_col2, info_col3 = st.columns(3)
+            info_col1, info_col2, info_col3 = st.columns(3)
         
-        with info_col1:
-            st.metric("Moneda", user_data["currency"])
-            st.metric("Edad", user_data["edad"])
+            with info_col1:
+                st.metric("Moneda", user_data["currency"])
+                st.metric("Edad", f"{user_data['edad']:g}")
         
-        with info_col2:
-            st.metric("Antigüedad Cuenta", f"{user_data['antiguedad']} años")
+            with info_col2:
+                st.metric("Antigüedad Cuenta", f"{user_data['antiguedad']:g} años")
         
-        with info_col3:
-            st.metric("Balance actual", format_currency(user_data["balance"], user_data["currency"]))
-            st.metric("Balance promedio", format_currency(user_data["balance_promedio"], user_data["currency"]))
+            with info_col3:
+                st.metric("Balance actual", format_currency(user_data["balance"], user_data["currency"]))
+                st.metric("Balance promedio", format_currency(user_data["balance_promedio"], user_data["currency"]))
         
         
-        with st.spinner("🧠 Calculando score crediticio..."):
-            time.sleep(1.5)
+            demo_delay("🧠 Calculando score crediticio...", 1.5)
 
-        scoring_result = calculate_credit_score(user_data)
+            scoring_result = calculate_credit_score(features, st.session_state.confidence)
         
-        st.session_state.scoring_result = scoring_result
+            st.session_state.scoring_result = scoring_result
         
-        st.session_state.user_data = user_data
+            st.session_state.user_data = user_data
 
 with col2:
     st.markdown("## 🎯 Análisis de Riesgo Crediticio")
@@ -238,30 +287,26 @@ with col2:
         result = st.session_state.scoring_result
         data = st.session_state.user_data
         
-        # Resultado principal
+        # Resultado principal y límite de crédito en un único bloque HTML
         if result["approved"]:
-            st.markdown(f"""
+            html = f"""
             <div class="success-box">
                 <h2 style="margin: 0; text-align: center;">✅ {result["recommendation"]}</h2>
                 <p style="text-align: center; margin: 10px 0;">Confianza: {result["confidence"]}%</p>
             </div>
-            """, unsafe_allow_html=True)
+            <div class="success-box">
+                <h3 style="text-align: center; margin: 0;">💳 Límite de Crédito Propuesto</h3>
+                <h2 style="text-align: center; margin: 10px 0; color: #28a745;">€{result["credit_limit"]:,}</h2>
+            </div>
+            """
         else:
-            st.markdown(f"""
+            html = f"""
             <div class="danger-box">
                 <h2 style="margin: 0; text-align: center;">❌ {result["recommendation"]}</h2>
                 <p style="text-align: center; margin: 10px 0;">Confianza: {result["confidence"]}%</p>
             </div>
-            """, unsafe_allow_html=True)
-        
-        # Límite de crédito
-        if result["approved"]:
-            st.markdown(f"""
-            <div class="success-box">
-                <h3 style="text-align: center; margin: 0;">💳 Límite de Crédito Propuesto</h3>
-                <h2 style="text-align: center; margin: 10px 0; color: #28a745;">€{result["credit_limit"]:,}</h2>
-            </div>
-            """, unsafe_allow_html=True)
+            """
+        st.markdown(html, unsafe_allow_html=True)
     
     else:
         st.info("👈 Los resultados del análisis aparecerán aquí una vez iniciada la simulación")
@@ -283,18 +328,19 @@ with col2:
         """)
 
 # Footer con información del proyecto
-st.markdown("---")
-st.markdown("""
+_FOOTER_HTML = """
 <div style="text-align: center; color: #666; padding: 20px;">
     <p><strong>Zenda PoC</strong> - Sistema de Scoring Crediticio Alternativo</p>
     <p>Máster en Fintech, Blockchain y Mercados Financieros - Universidad de Barcelona</p>
     <p>Desarrollado por: Alondra García Ávila, Lucía Santandreu y Camila Díaz Lafourcade</p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown("---")
+st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 # Botón para reiniciar
 if hasattr(st.session_state, 'start_simulation'):
     if st.button("🔄 Nueva Simulación", use_container_width=True):
-        for key in list(st.session_state.keys()):
-            del st.session_state[key]
+        st.session_state.clear()
         st.rerun()